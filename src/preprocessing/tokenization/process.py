@@ -1,96 +1,264 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import csv
+import mmap
+import os
+import shutil
+import tempfile
 import unicodedata
-import re
 import pandas as pd
 
+try:  # optional: faster multithreaded CSV parsing; falls back to pandas' C parser
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+# Built once at import: str.translate table dropping C0 control chars and DEL
+_CTRL_TABLE = dict.fromkeys([*range(0x20), 0x7F])
+# Same, but keeps "\n" and turns "\r" into "\n" so a whole block can be cleaned
+# before splitting lines (universal newlines, as in text-mode iteration)
+_CTRL_TABLE_KEEP_NL = {**_CTRL_TABLE, ord("\n"): "\n", ord("\r"): "\n"}
+# Runs of exactly the characters str.split() treats as whitespace; spelled out
+# because "\s" is ASCII-only in RE2, which pyarrow-backed pandas strings use
+_WS_RUN = "[\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+"
+
+# Bytes per block when scanning memory-mapped TXT/MD files (16 MiB)
+_READ_CHUNK = 1 << 24
+# madvise readahead hints are only available on some platforms (Linux, macOS)
+_HAS_MADVISE = hasattr(mmap, "MADV_WILLNEED") and hasattr(mmap, "MADV_SEQUENTIAL")
+
+# Large write buffer so corpus output amortizes syscalls over ~1 MiB
+_WRITE_BUFFER = 1 << 20
+
+# Rows per pd.read_csv chunk; bounds CSV memory to one chunk of the text column
+_CSV_CHUNKSIZE = 256_000
+# Bytes per pyarrow CSV block when pyarrow is installed
+_ARROW_BLOCK_SIZE = 1 << 22
+
 # ---------------------------
 # Text normalization function
 # ---------------------------
-def normalize_text(text: str) -> str:
-    """Normalize text: NFKC unicode, remove control chars, normalize spaces."""
-    text = unicodedata.normalize("NFKC", text)
-    text = re.sub(r"[\u0000-\u001F\u007F]", "", text)  # Remove control chars
-    text = re.sub(r"\s+", " ", text).strip()           # Collapse multiple spaces
-    return text
+def normalize_text(text: str, skip_nfkc: bool = False) -> str:
+    """
+    Normalize text: NFKC unicode, remove control chars, normalize spaces.
+
+    skip_nfkc leaves out the NFKC pass. Only use it when the text is fed to a
+    SentencePiece trainer whose normalization rule already applies NFKC
+    (e.g. nmt_nfkc); evaluation must keep NFKC to match what the model saw.
+    """
+    if not skip_nfkc:
+        text = unicodedata.normalize("NFKC", text)
+    text = text.translate(_CTRL_TABLE)  # Remove control chars
+    return " ".join(text.split())       # Collapse multiple spaces
+# ---------------------------
+# Block-wise TXT/MD reader
+# ---------------------------
+def _iter_text_blocks(file_path, skip_nfkc=False):
+    """
+    Yield the normalized, non-empty lines of a text file, one list per block.
+
+    The file is memory-mapped and decoded in blocks of about _READ_CHUNK bytes cut
+    at a newline; each block is normalized in one NFKC + translate pass, while the
+    kernel is asked to prefetch the next block so disk reads overlap normalization.
+    Equivalent to normalize_text(line, skip_nfkc) on every line of the file.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, size = 0, len(mm)
+            if _HAS_MADVISE:
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            while start < size:
+                end = mm.rfind(b"\n", start, start + _READ_CHUNK) + 1
+                if end <= start:  # no newline in this window: extend to the next one
+                    end = mm.find(b"\n", start + _READ_CHUNK) + 1 or size
+                if _HAS_MADVISE and end < size:
+                    ahead = end - end % mmap.PAGESIZE  # madvise needs a page-aligned start
+                    mm.madvise(mmap.MADV_WILLNEED, ahead, min(_READ_CHUNK, size - ahead))
+
+                block = mm[start:end].decode("utf-8")
+                if not skip_nfkc:
+                    block = unicodedata.normalize("NFKC", block)
+                block = block.translate(_CTRL_TABLE_KEEP_NL)
+                # Whitespace collapse and empty-line filter run entirely in C builtins
+                yield list(filter(None, map(" ".join, map(str.split, block.split("\n")))))
+                start = end
+# ---------------------------
+# Chunked CSV reader
+# ---------------------------
+def _iter_csv_column(file_path, text_column=None):
+    """
+    Yield the text column of a CSV file one chunk at a time.
+    Uses pyarrow's streaming CSV reader when available, else chunked pd.read_csv.
+
+    Args:
+        file_path: Path to the CSV file.
+        text_column: Column containing text (default: first column).
+    """
+    if pacsv is not None:
+        yield from _iter_csv_column_arrow(file_path, text_column)
+    else:
+        yield from _iter_csv_column_pandas(file_path, text_column)
+
+
+def _iter_csv_column_pandas(file_path, text_column=None):
+    """pandas variant of _iter_csv_column: chunked read of only the text column, as strings."""
+    reader = pd.read_csv(
+        file_path,
+        usecols=[text_column] if text_column else [0],
+        dtype=str,
+        chunksize=_CSV_CHUNKSIZE,
+        engine="c",
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk.iloc[:, 0]
+# ---------------------------
+# Chunked CSV reader (pyarrow)
+# ---------------------------
+def _iter_csv_column_arrow(file_path, text_column=None):
+    """pyarrow variant of _iter_csv_column: parses only the text column, as strings."""
+    if not text_column:
+        # utf-8-sig: Arrow strips a leading BOM itself, so the header name must not keep it
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return
+        text_column = header[0]
+
+    reader = pacsv.open_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=_ARROW_BLOCK_SIZE),
+        # Quoted text cells may span lines, as the pandas C parser allows
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=[text_column],
+            column_types={text_column: pa.string()},
+            strings_can_be_null=True,  # same missing-value handling as pandas
+        ),
+    )
+    for batch in reader:
+        yield batch.column(0).to_pandas()
+# ---------------------------
+# Vectorized normalization for CSV columns
+# ---------------------------
+def _normalize_series(col: pd.Series, skip_nfkc: bool = False) -> pd.Series:
+    """Column-wise normalize_text via pandas .str ops; drops missing and empty cells."""
+    col = col.dropna()
+    if not skip_nfkc:
+        col = col.str.normalize("NFKC")
+    col = col.str.translate(_CTRL_TABLE)
+    col = col.str.replace(_WS_RUN, " ", regex=True).str.strip(" ")
+    return col[col != ""]
 # ---------------------------
 # Load corpus from multiple formats
 # ---------------------------
 def load_corpus(file_path: str, file_type: str = "txt", text_column: str = None):
     """
-    Load corpus lines from a file for evaluation.
+    Stream corpus lines from a file for evaluation.
     
     Args:
         file_path: Path to the corpus file.
         file_type: 'txt', 'csv', or 'md'.
         text_column: For CSV, column containing text.
     
-    Returns:
-        List of normalized text lines.
+    Yields:
+        Normalized text lines. This is a generator: it can only be iterated once.
     """
-    lines = []
     file_path = Path(file_path)
 
     try:
         if file_type in ["txt", "md"]:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = normalize_text(line)
-                    if line:
-                        lines.append(line)
+            for block in _iter_text_blocks(file_path):
+                yield from block
 
         elif file_type == "csv":
-            df = pd.read_csv(file_path, usecols=[text_column] if text_column else None)
-            for text in df[text_column] if text_column else df.iloc[:,0]:
-                text = normalize_text(str(text))
-                if text:
-                    lines.append(text)
+            for col in _iter_csv_column(file_path, text_column):
+                yield from _normalize_series(col)
     except Exception as e:
         print(f"⚠ Skipping {file_path} due to error: {e}")
+# ---------------------------
+# Bulk line writer
+# ---------------------------
+def _write_lines(out, lines) -> int:
+    """Write lines to out with one newline-joined write; return the number written."""
+    if len(lines):
+        out.write("\n".join(lines))
+        out.write("\n")
+    return len(lines)
+# ---------------------------
+# Per-file worker for prepare_corpus
+# ---------------------------
+def _process_file(task):
+    """
+    Normalize a single corpus file into its own part file. Runs in a worker process.
 
-    return lines
+    Args:
+        task: (file, ext, text_column, skip_nfkc, part_file) tuple.
+
+    Returns:
+        (lines written, error message or None)
+    """
+    file, ext, text_column, skip_nfkc, part_file = task
+    n_lines = 0
+
+    with open(part_file, "w", encoding="utf-8", buffering=_WRITE_BUFFER) as out:
+        try:
+            if ext == "txt" or ext == "md":
+                for block in _iter_text_blocks(file, skip_nfkc):
+                    n_lines += _write_lines(out, block)
+
+            elif ext == "csv":
+                for col in _iter_csv_column(file, text_column):
+                    n_lines += _write_lines(out, _normalize_series(col, skip_nfkc))
+
+        except Exception as e:
+            return n_lines, f"⚠ Skipping {file} due to error: {e}"
+
+    return n_lines, None
 # ---------------------------
 # Prepare corpus from multiple formats
 # ---------------------------
-def prepare_corpus(input_dir: str, output_file: str, file_types=None, text_column=None):
+def prepare_corpus(input_dir: str, output_file: str, file_types=None, text_column=None, max_workers=None,
+                   skip_nfkc=False):
     """
     Reads TXT, CSV, and Markdown files from input_dir, normalizes text, and writes to output_file.
+    Files are normalized in parallel, each worker writing a part file; parts are merged in file order.
 
     Args:
         input_dir: Path to folder containing files
         output_file: Path to output corpus
         file_types: List of file extensions to read, e.g., ['txt', 'csv', 'md']
         text_column: For CSV files, specify the column to extract text from
+        max_workers: Number of worker processes (default: os.cpu_count())
+        skip_nfkc: Skip the NFKC pass; only when the SentencePiece trainer's normalization rule applies NFKC
     """
     if file_types is None:
         file_types = ['txt', 'csv', 'md']
 
     input_path = Path(input_dir)
-    all_lines = []
-
-    for ext in file_types:
-        for file in input_path.glob(f"*.{ext}"):
-            try:
-                if ext == "txt" or ext == "md":
-                    with open(file, "r", encoding="utf-8") as f:
-                        for line in f:
-                            line = normalize_text(line)
-                            if line:
-                                all_lines.append(line)
-
-                elif ext == "csv":
-                    df = pd.read_csv(file, usecols=[text_column] if text_column else None)
-                    for text in df[text_column] if text_column else df.iloc[:,0]:
-                        text = normalize_text(str(text))
-                        if text:
-                            all_lines.append(text)
-
-            except Exception as e:
-                print(f"⚠ Skipping {file} due to error: {e}")
-
-    # Write all normalized lines to output file
-    with open(output_file, "w", encoding="utf-8") as out:
-        for line in all_lines:
-            out.write(line + "\n")
-
-    print(f"✅ Corpus prepared: {len(all_lines)} lines written to {output_file}")
+    files = [(file, ext) for ext in file_types for file in input_path.glob(f"*.{ext}")]
+    n_lines = 0
+
+    # Part files live next to the output so the final merge stays on one filesystem
+    with tempfile.TemporaryDirectory(dir=Path(output_file).resolve().parent) as tmp_dir:
+        tasks = [(file, ext, text_column, skip_nfkc, Path(tmp_dir) / f"{i}.part")
+                 for i, (file, ext) in enumerate(files)]
+
+        if tasks:
+            workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+            chunksize = max(1, len(tasks) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for count, error in ex.map(_process_file, tasks, chunksize=chunksize):
+                    if error:
+                        print(error)
+                    n_lines += count
+
+        with open(output_file, "wb", buffering=_WRITE_BUFFER) as out:
+            for *_, part_file in tasks:
+                with open(part_file, "rb") as part:
+                    shutil.copyfileobj(part, out, _WRITE_BUFFER)
 
+    print(f"✅ Corpus prepared: {n_lines} lines written to {output_file}")
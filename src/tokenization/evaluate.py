@@ -1,12 +1,44 @@
+from collections import Counter
 import sentencepiece as spm
-from pathlib import Path
-import unicodedata
-import re
-import pandas as pd
 from src.preprocessing.tokenization.process import load_corpus
 
 
 
+# Lines per encoding batch; keeps each sp.encode call in C++ while bounding memory
+_ENCODE_BATCH = 10_000
+
+# Max cached word -> piece-count entries before the cache is reset
+_CACHE_SIZE = 200_000
+
+# ---------------------------
+# Cached piece counting
+# ---------------------------
+def _count_pieces(sp, word_counts, cache):
+    """
+    Count pieces for a batch of word occurrences; return (total pieces, words split into >1 piece).
+
+    Words missing from cache are encoded together in one sp.encode call. Word
+    frequencies are Zipfian, so most occurrences are cache hits.
+    """
+    misses = [word for word in word_counts if word not in cache]
+    encoded = dict(zip(misses, map(len, sp.encode(misses, out_type=int)))) if misses else {}
+
+    total_tokens = 0
+    split_words = 0
+    for word, count in word_counts.items():
+        n = cache.get(word)
+        if n is None:
+            n = encoded[word]
+        total_tokens += n * count
+        if n > 1:
+            split_words += count
+
+    if len(cache) + len(encoded) > _CACHE_SIZE:
+        cache.clear()
+    cache.update(encoded)
+
+    return total_tokens, split_words
+
 # ---------------------------
 # Tokenizer evaluation
 # ---------------------------
@@ -15,7 +47,7 @@ def evaluate_tokenizer(lines, sp):
     Evaluate SentencePiece tokenizer metrics: Fertility, CPT, WFR.
     
     Args:
-        lines: List of normalized text lines.
+        lines: Iterable of normalized text lines, consumed in a single pass.
         sp: SentencePieceProcessor object.
     
     Returns:
@@ -25,17 +57,28 @@ def evaluate_tokenizer(lines, sp):
     total_words = 0
     total_chars = 0
     split_words = 0
+    cache = {}
+    word_counts = Counter()
+    batch_lines = 0
 
     for line in lines:
         words = line.split()
         total_words += len(words)
-        total_chars += len(line.replace(" ", ""))
-
-        for word in words:
-            pieces = sp.encode(word, out_type=str)
-            total_tokens += len(pieces)
-            if len(pieces) > 1:
-                split_words += 1
+        total_chars += len(line) - line.count(" ")
+        word_counts.update(words)
+        batch_lines += 1
+
+        if batch_lines >= _ENCODE_BATCH:
+            tokens, splits = _count_pieces(sp, word_counts, cache)
+            total_tokens += tokens
+            split_words += splits
+            word_counts.clear()
+            batch_lines = 0
+
+    if word_counts:
+        tokens, splits = _count_pieces(sp, word_counts, cache)
+        total_tokens += tokens
+        split_words += splits
 
     fertility = total_tokens / total_words if total_words else 0
     cpt = total_chars / total_tokens if total_tokens else 0
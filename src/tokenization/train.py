@@ -1,8 +1,13 @@
+from dataclasses import dataclass, fields
+import os
+import sys
 import sentencepiece as spm
-import argparse
 from src.tokenization.evaluate import run_evaluation
 from src.preprocessing.tokenization.process import prepare_corpus
 
+# SentencePiece normalization rules that already apply NFKC during training
+NFKC_RULES = {"nfkc", "nmt_nfkc", "nfkc_cf", "nmt_nfkc_cf"}
+
 # =============================
 # TOKENIZER TRAINING
 # =============================
@@ -38,39 +43,92 @@ def train_tokenizer(args):
 
 
 # =============================
-# MAIN
+# ARGUMENTS
 # =============================
-if __name__ == "__main__":
+MODEL_TYPES = ("unigram", "bpe", "word", "char")
+
+
+@dataclass(frozen=True, slots=True)
+class TrainArgs:
+    """Training options; field names match the CLI flags and, upper-cased, the env vars."""
+    input_dir: str = "data"
+    corpus: str = "corpus.txt"
+    model_save_dir: str = "tokenizer_models"
+    model_prefix: str = "my_tokenizer"
+    vocab_size: int = 16000
+    model_type: str = "unigram"
+    character_coverage: float = 0.9995
+    norm_rule: str = "nmt_nfkc"
+    sample_size: int = 10000000
+    max_sentence_length: int = 4096
+    byte_fallback: bool = False
+
+    @classmethod
+    def from_env(cls):
+        """Build args from environment variables (e.g. VOCAB_SIZE=32000); unset ones keep defaults."""
+        values = {}
+        for f in fields(cls):
+            raw = os.environ.get(f.name.upper())
+            if raw is None:
+                continue
+            if f.type is bool:
+                values[f.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[f.name] = f.type(raw)
+
+        model_type = values.get("model_type")
+        if model_type is not None and model_type not in MODEL_TYPES:
+            raise ValueError(f"MODEL_TYPE must be one of {', '.join(MODEL_TYPES)}; got {model_type!r}")
+        return cls(**values)
+
+
+def parse_args(argv):
+    """
+    Parse CLI flags into TrainArgs. argparse is only imported when flags are given.
+    Flags override environment variables, which override the built-in defaults.
+    """
+    import argparse
+
+    d = TrainArgs.from_env()
     parser = argparse.ArgumentParser(description="Train SentencePiece Tokenizer")
 
-    parser.add_argument("--input_dir", type=str, default="data",
+    parser.add_argument("--input_dir", type=str, default=d.input_dir,
                         help="Directory containing text files")
-    parser.add_argument("--corpus", type=str, default="corpus.txt",
+    parser.add_argument("--corpus", type=str, default=d.corpus,
                         help="Merged training corpus file")
-    parser.add_argument("--model_save_dir", type=str, default="tokenizer_models",
+    parser.add_argument("--model_save_dir", type=str, default=d.model_save_dir,
                         help="Output model save directory")
-    parser.add_argument("--model_prefix", type=str, default="my_tokenizer",
+    parser.add_argument("--model_prefix", type=str, default=d.model_prefix,
                         help="Output model prefix")
-    parser.add_argument("--vocab_size", type=int, default=16000,
+    parser.add_argument("--vocab_size", type=int, default=d.vocab_size,
                         help="Vocabulary size")
-    parser.add_argument("--model_type", type=str, default="unigram",
-                        choices=["unigram", "bpe", "word", "char"],
+    parser.add_argument("--model_type", type=str, default=d.model_type,
+                        choices=MODEL_TYPES,
                         help="SentencePiece model type")
-    parser.add_argument("--character_coverage", type=float, default=0.9995,
+    parser.add_argument("--character_coverage", type=float, default=d.character_coverage,
                         help="Character coverage")
-    parser.add_argument("--norm_rule", type=str, default="nmt_nfkc",
+    parser.add_argument("--norm_rule", type=str, default=d.norm_rule,
                         help="Normalization rule")
-    parser.add_argument("--sample_size", type=int, default=10000000,
+    parser.add_argument("--sample_size", type=int, default=d.sample_size,
                         help="Number of sentences sampled for training")
-    parser.add_argument("--max_sentence_length", type=int, default=4096,
+    parser.add_argument("--max_sentence_length", type=int, default=d.max_sentence_length,
                         help="Max sentence length")
-    parser.add_argument("--byte_fallback", action="store_true",
+    parser.add_argument("--byte_fallback", action="store_true", default=d.byte_fallback,
                         help="Enable byte fallback")
 
-    args = parser.parse_args()
+    return TrainArgs(**vars(parser.parse_args(argv)))
+
+
+# =============================
+# MAIN
+# =============================
+if __name__ == "__main__":
+    # Environment variables are the base either way; without flags argparse is skipped entirely
+    args = parse_args(sys.argv[1:]) if len(sys.argv) > 1 else TrainArgs.from_env()
 
     print("🔹 Preparing corpus...")
-    prepare_corpus(args.input_dir, args.corpus)
+    # SentencePiece re-applies NFKC for these rules, so the Python pass would be redundant
+    prepare_corpus(args.input_dir, args.corpus, skip_nfkc=args.norm_rule in NFKC_RULES)
 
     print("🔹 Training tokenizer...")
     train_tokenizer(args)
@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+except ImportError:
+    pandas = pyarrow = None
+
+if pandas is not None:
+    from src.preprocessing.tokenization.process import (
+        _iter_csv_column_arrow,
+        _iter_csv_column_pandas,
+        _normalize_series,
+    )
+
+
+def _lines(columns):
+    return [line for col in columns for line in _normalize_series(col)]
+
+
+@unittest.skipIf(pyarrow is None, "pandas and pyarrow are required")
+class TestCsvReaders(unittest.TestCase):
+    """The pyarrow CSV path must yield the same lines as the pandas path."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, content, encoding="utf-8"):
+        path = Path(self.tmp.name) / "data.csv"
+        path.write_text(content, encoding=encoding, newline="")
+        return path
+
+    def _assert_same(self, path, text_column=None):
+        expected = _lines(_iter_csv_column_pandas(path, text_column))
+        self.assertEqual(_lines(_iter_csv_column_arrow(path, text_column)), expected)
+        return expected
+
+    def test_multiline_quoted_cell(self):
+        path = self._write('text,label\n"first line\nsecond  line",1\nplain,2\n')
+        # The embedded newline is a control char, dropped as in normalize_text
+        expected = ["first linesecond line", "plain"]
+        self.assertEqual(self._assert_same(path), expected)
+        self.assertEqual(self._assert_same(path, "text"), expected)
+
+    def test_bom_header_first_column(self):
+        path = self._write("text,label\nhello,1\n", encoding="utf-8-sig")
+        self.assertEqual(self._assert_same(path), ["hello"])
+
+    def test_empty_file(self):
+        path = self._write("")
+        self.assertEqual(list(_iter_csv_column_arrow(path)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()